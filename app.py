@@ -1,13 +1,15 @@
-from flask import Flask, render_template, redirect, url_for, request, g, current_app, jsonify, make_response
+from flask import Flask, render_template, redirect, url_for, request, g, current_app, jsonify, make_response, has_request_context
 from flask_login import current_user, login_required
 from flask_cors import CORS
-from extensions import db, login_manager
-from models import User
+from extensions import db, login_manager, cache, engine_options, json_serializer, OrjsonProvider
+from models import get_user
 from flask_mail import Mail
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import event
 import random
 import os
 import logging
-from logging.handlers import TimedRotatingFileHandler, RotatingFileHandler
+from logging.handlers import TimedRotatingFileHandler, RotatingFileHandler, QueueHandler, QueueListener
 from pythonjsonlogger import jsonlogger
 import traceback
 import time
@@ -17,6 +19,11 @@ from datetime import timedelta
 from routes.dashboard import dashboard as dashboard_blueprint
 from routes.auth import auth as auth_blueprint
 import socket
+import queue
+import atexit
+
+# In debug mode, requests issuing more statements than this are logged as likely N+1 loads
+QUERY_COUNT_WARNING = 10
 
 def is_port_in_use(port):
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -58,7 +65,11 @@ def setup_logging(app):
     if not os.path.exists('logs'):
         os.makedirs('logs')
 
-    formatter = CustomJsonFormatter('%(timestamp)s %(level)s %(name)s %(message)s')
+    formatter = CustomJsonFormatter(
+        '%(timestamp)s %(level)s %(name)s %(message)s',
+        json_default=str,
+        json_serializer=json_serializer
+    )
     
     # Add rotating file handler for app.log
     file_handler = RotatingFileHandler(
@@ -76,22 +87,33 @@ def setup_logging(app):
         backupCount=30,
         encoding='utf-8'
     )
-    file_handler.setFormatter(formatter)
     file_handler.setLevel(logging.INFO)
 
     console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
     console_handler.setLevel(logging.INFO)
 
+    # Records are formatted on the request thread, where the formatter can
+    # still read g/request/current_user, and written out by a background
+    # listener so file and console I/O stay off the request path
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(formatter)
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
     app.logger.setLevel(logging.INFO)
     app.logger.handlers = []
-    app.logger.addHandler(file_handler)
-    app.logger.addHandler(console_handler)
+    app.logger.addHandler(queue_handler)
 
     return app.logger
 
 def create_app():
     app = Flask(__name__)
+    # Keep every compiled template in memory; outside debug mode the
+    # template files are not stat'ed again on each render
+    app.jinja_options = {**app.jinja_options, 'cache_size': -1}
+    app.json = OrjsonProvider(app)
     
     # Enable CORS
     CORS(app)
@@ -101,17 +123,29 @@ def create_app():
         SECRET_KEY=os.environ.get('FLASK_SECRET_KEY', 'default_secret_key'),
         SQLALCHEMY_DATABASE_URI=os.environ.get('DATABASE_URL'),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SQLALCHEMY_ENGINE_OPTIONS=engine_options(os.environ.get('DATABASE_URL')),
         SESSION_COOKIE_SECURE=True,
         SESSION_COOKIE_HTTPONLY=True,
         SESSION_COOKIE_SAMESITE='Lax',
-        PERMANENT_SESSION_LIFETIME=timedelta(minutes=60)
+        PERMANENT_SESSION_LIFETIME=timedelta(minutes=60),
+        # Shared Redis cache when configured, otherwise a per-process cache
+        CACHE_TYPE='RedisCache' if os.environ.get('REDIS_URL') else 'SimpleCache',
+        CACHE_REDIS_URL=os.environ.get('REDIS_URL'),
+        CACHE_DEFAULT_TIMEOUT=300
     )
 
     # Set up logging first
     logger = setup_logging(app)
 
+    # Compiled templates are shared across workers and restarts, so a cold
+    # worker loads bytecode instead of re-parsing template source. With no
+    # directory given, Jinja uses a private per-user temp dir and checks its owner
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+    app.jinja_env.filters['shuffle'] = shuffle_filter
+
     # Initialize extensions
     db.init_app(app)
+    cache.init_app(app)
     
     # Configure login manager
     login_manager.init_app(app)
@@ -120,7 +154,9 @@ def create_app():
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        user = get_user(int(user_id))
+        # Reattach the cached instance without a SELECT so relationships still load lazily
+        return db.session.merge(user, load=False) if user else None
 
     @app.before_request
     def before_request():
@@ -132,6 +168,9 @@ def create_app():
         if hasattr(g, 'start_time'):
             total_time = (time.time() - g.start_time) * 1000
             logger.info(f"Request completed in {total_time:.2f}ms")
+
+        if app.debug and g.get('query_count', 0) > QUERY_COUNT_WARNING:
+            logger.warning(f"{request.endpoint} issued {g.query_count} queries (budget {QUERY_COUNT_WARNING})")
         
         # Add security headers
         response.headers.update({
@@ -148,6 +187,13 @@ def create_app():
 
     # Initialize database
     with app.app_context():
+        # Count statements on this app's own engine, once per create_app
+        if app.debug:
+            @event.listens_for(db.engine, 'before_cursor_execute')
+            def count_query(conn, cursor, statement, parameters, context, executemany):
+                if has_request_context():
+                    g.query_count = g.get('query_count', 0) + 1
+
         db.create_all()
         logger.info('Database tables created successfully')
 
@@ -174,6 +220,10 @@ def create_app():
         
         db.session.commit()
 
+    # Compile every template now so the first request for each page doesn't pay for it
+    for template_name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template_name)
+
     @app.route('/')
     def index():
         if current_user.is_authenticated:
@@ -201,7 +251,6 @@ def shuffle_filter(seq):
         return seq
 
 app = create_app()
-app.jinja_env.filters['shuffle'] = shuffle_filter
 
 if __name__ == '__main__':
     port = 5000
@@ -1,10 +1,66 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+from flask_caching import Cache
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import DeclarativeBase
+import orjson
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+# Sessions are request-scoped, so objects can keep their committed state
+# instead of re-SELECTing on the first attribute read after each commit
+db = SQLAlchemy(model_class=Base, session_options={'expire_on_commit': False})
 login_manager = LoginManager()
 login_manager.login_view = 'login'
+cache = Cache()
+
+def json_serializer(value, default=None, **kwargs):
+    """Serialize JSON columns and log records with orjson; both expect a str.
+
+    Accepts json.dumps-style keywords so python-json-logger can call it;
+    only default is honoured.
+    """
+    return orjson.dumps(value, default=default).decode()
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson for jsonify, sessions and get_json.
+
+    Dates and dataclasses still go through Flask's default hook, so their
+    output matches the stock provider.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+# Shared by every app that binds the db extension
+ENGINE_OPTIONS = {
+    'json_serializer': json_serializer,
+    'json_deserializer': orjson.loads,
+    # Connection pool sizing and health checks for long-running PDF processing
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+}
+
+# psycopg2 fast execution helpers: multi-row INSERTs and batched executemany.
+# Other dialects reject these keywords, so they are only added for psycopg2 URLs.
+PSYCOPG2_ENGINE_OPTIONS = {
+    'executemany_mode': 'values_plus_batch',
+    'insertmanyvalues_page_size': 1000,
+}
+
+def engine_options(database_url):
+    """Return SQLALCHEMY_ENGINE_OPTIONS suited to the driver in database_url."""
+    options = dict(ENGINE_OPTIONS)
+    if database_url and make_url(database_url).drivername in ('postgresql', 'postgresql+psycopg2'):
+        options.update(PSYCOPG2_ENGINE_OPTIONS)
+    return options
@@ -1,16 +1,21 @@
 from datetime import datetime, timedelta
-from extensions import db
+from extensions import db, cache
+from sqlalchemy.dialects.postgresql import JSONB
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 import logging
 import os
-from utils.pdf_parser import QuestionProcessor
 import jwt
 from time import time
-from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# argon2id at OWASP's baseline cost; verifying is several times cheaper
+# than werkzeug's default scrypt while staying memory-hard
+password_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
@@ -27,10 +32,27 @@ class User(UserMixin, db.Model):
     study_timers = db.relationship('StudyTimer', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Verify a password, rehashing older werkzeug or weaker argon2 hashes.
+
+        A rehash only changes password_hash; the caller commits it.
+        """
+        if not self.password_hash:
+            return False
+        if not self.password_hash.startswith('$argon2'):
+            if not check_password_hash(self.password_hash, password):
+                return False
+        else:
+            try:
+                password_hasher.verify(self.password_hash, password)
+            except (VerificationError, InvalidHashError):
+                return False
+            if not password_hasher.check_needs_rehash(self.password_hash):
+                return True
+        self.set_password(password)
+        return True
         
     def is_administrator(self):
         return self.is_admin
@@ -75,6 +97,11 @@ class User(UserMixin, db.Model):
             StudySession.start_time > datetime.utcnow()
         ).order_by(StudySession.start_time).all()
 
+@cache.memoize(60)
+def get_user(user_id):
+    """Load a user for the login manager; cleared wherever the stored password hash is rewritten."""
+    return db.session.get(User, user_id)
+
 class StudyTimer(db.Model):
     __tablename__ = 'study_timers'
     id = db.Column(db.Integer, primary_key=True)
@@ -143,88 +170,42 @@ class Question(db.Model):
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), nullable=False)
     question_text = db.Column(db.Text, nullable=False)
     correct_answer = db.Column(db.Text, nullable=False)
-    wrong_answers = db.Column(db.JSON)
+    wrong_answers = db.Column(db.JSON().with_variant(JSONB, 'postgresql'))
     difficulty_level = db.Column(db.Float, default=2.5)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_used = db.Column(db.DateTime)
     times_used = db.Column(db.Integer, default=0)
     success_rate = db.Column(db.Float, default=0.0)
     user_performance = db.relationship('UserQuestionPerformance', backref='question', lazy=True)
-    
-    @classmethod
-    def seed_from_pdfs(cls, pdf_directory: str) -> tuple[int, list[str]]:
-        """
-        Seed questions from PDF files in the specified directory using enhanced QuestionProcessor.
-        Returns tuple of (number of questions added, list of errors).
-        """
-        total_questions_added = 0
-        all_errors = []
-        
-        # Initialize QuestionProcessor
-        processor = QuestionProcessor(pdf_directory, 'processed_questions')
-        pdf_dir = Path(pdf_directory)
-        
-        try:
-            # Process each PDF file in the directory
-            for pdf_file in pdf_dir.glob('*.pdf'):
-                logger.info(f"Processing PDF file: {pdf_file.name}")
-                
-                # Process PDF using the enhanced processor
-                questions, errors = processor.process_pdf(pdf_file.name)
-                
-                # Add any processing errors to our list
-                all_errors.extend([error.message for error in errors])
-                
-                # Process extracted questions
-                for question_data in questions:
-                    try:
-                        category = Category.get_by_name(question_data.category)
-                        if not category:
-                            error_msg = f"Category not found: {question_data.category}"
-                            logger.warning(error_msg)
-                            all_errors.append(error_msg)
-                            continue
-                            
-                        # Check for duplicate questions
-                        existing = cls.query.filter_by(
-                            question_text=question_data.question_text,
-                            category_id=category.id
-                        ).first()
-                        
-                        if not existing:
-                            question = cls(
-                                category_id=category.id,
-                                question_text=question_data.question_text,
-                                correct_answer=question_data.correct_answer,
-                                wrong_answers=question_data.wrong_answers
-                            )
-                            db.session.add(question)
-                            total_questions_added += 1
-                            
-                    except Exception as e:
-                        error_msg = f"Error adding question: {str(e)}"
-                        logger.error(error_msg)
-                        all_errors.append(error_msg)
-                
-                try:
-                    if total_questions_added > 0:
-                        db.session.commit()
-                        logger.info(f"Added {total_questions_added} questions from {pdf_file.name}")
-                except Exception as e:
-                    db.session.rollback()
-                    error_msg = f"Error committing questions from {pdf_file.name}: {str(e)}"
-                    logger.error(error_msg)
-                    all_errors.append(error_msg)
-        
-        except Exception as e:
-            error_msg = f"Error processing PDF directory: {str(e)}"
-            logger.error(error_msg)
-            all_errors.append(error_msg)
-        
-        return total_questions_added, all_errors
+
+# One copy of each question per category, keyed by dialect. PostgreSQL indexes
+# md5(question_text) because a btree entry can't hold an arbitrarily long Text
+# value; SQLite has no md5() and indexes the text itself.
+QUESTION_TEXT_INDEXES = {
+    'postgresql': db.Index(
+        'uq_questions_category_text_md5',
+        Question.category_id, db.func.md5(Question.question_text),
+        unique=True
+    ).ddl_if(dialect='postgresql'),
+    'sqlite': db.Index(
+        'uq_questions_category_text',
+        Question.category_id, Question.question_text,
+        unique=True
+    ).ddl_if(dialect='sqlite'),
+}
+
+class ProcessedPDF(db.Model):
+    __tablename__ = 'processed_pdfs'
+    sha256 = db.Column(db.String(64), primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    processed_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Test(db.Model):
     __tablename__ = 'tests'
+    __table_args__ = (
+        # Serves a user's test history newest-first (scanned backwards for DESC)
+        db.Index('ix_tests_user_created', 'user_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='SET NULL'))
@@ -239,7 +220,7 @@ class Test(db.Model):
 class TestQuestion(db.Model):
     __tablename__ = 'test_questions'
     id = db.Column(db.Integer, primary_key=True)
-    test_id = db.Column(db.Integer, db.ForeignKey('tests.id', ondelete='CASCADE'), nullable=False)
+    test_id = db.Column(db.Integer, db.ForeignKey('tests.id', ondelete='CASCADE'), nullable=False, index=True)
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False)
     user_answer = db.Column(db.Text)
     is_correct = db.Column(db.Boolean)
@@ -302,6 +283,11 @@ class TestQuestion(db.Model):
 
 class UserQuestionPerformance(db.Model):
     __tablename__ = 'user_question_performance'
+    __table_args__ = (
+        # Every lookup is per user: dashboard rollups on the prefix, and
+        # the challenging-questions join on the full key
+        db.Index('ix_uqp_user_question', 'user_id', 'question_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False)
@@ -331,96 +317,3 @@ class UserQuestionPerformance(db.Model):
         if self.total_attempts == 0:
             return 0
         return (self.correct_attempts / self.total_attempts) * 100
-
-
-    @classmethod
-    def get_question_count_by_category(cls, category_id=None):
-        """Get the number of questions in a category or all categories."""
-        try:
-            query = db.session.query(
-                Category.name,
-                db.func.count(Question.id).label('count')
-            ).outerjoin(Question)
-            
-            if category_id:
-                query = query.filter(Category.id == category_id)
-                
-            query = query.group_by(Category.name)
-            return {row[0]: row[1] for row in query.all()}
-            
-        except Exception as e:
-            logger.error(f"Error getting question count: {str(e)}")
-            return {}
-
-    @classmethod
-    def needs_question_generation(cls, min_threshold=50):
-        """Check if any category needs more questions."""
-        counts = cls.get_question_count_by_category()
-        return {cat: count for cat, count in counts.items() if count < min_threshold}
-
-    @classmethod
-    def generate_questions_for_category(cls, category_name, count_needed):
-        """Generate questions for a category that needs more questions."""
-        try:
-            from utils.perplexity import generate_questions
-            logger.info(f"Generating {count_needed} questions for {category_name}")
-            
-            questions = generate_questions(category_name, count=count_needed)
-            if not questions:
-                logger.error(f"Failed to generate questions for {category_name}")
-                return 0
-                
-            added_count = 0
-            category = Category.get_by_name(category_name)
-            if not category:
-                logger.error(f"Category not found: {category_name}")
-                return 0
-                
-            for question_data in questions:
-                try:
-                    existing = cls.query.filter_by(
-                        question_text=question_data['question_text'],
-                        category_id=category.id
-                    ).first()
-                    
-                    if not existing:
-                        question = cls(
-                            category_id=category.id,
-                            question_text=question_data['question_text'],
-                            correct_answer=question_data['correct_answer'],
-                            wrong_answers=question_data['wrong_answers']
-                        )
-                        db.session.add(question)
-                        added_count += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error adding generated question: {str(e)}")
-                    continue
-                    
-            db.session.commit()
-            logger.info(f"Added {added_count} questions to {category_name}")
-            return added_count
-            
-        except Exception as e:
-            logger.error(f"Error generating questions: {str(e)}")
-            db.session.rollback()
-            return 0
-
-    @classmethod
-    def maintain_question_pool(cls, min_threshold=50):
-        """Background task to maintain minimum number of questions per category."""
-        try:
-            needed = cls.needs_question_generation(min_threshold)
-            total_added = 0
-            
-            for category, current_count in needed.items():
-                count_needed = min_threshold - current_count
-                if count_needed > 0:
-                    added = cls.generate_questions_for_category(category, count_needed)
-                    total_added += added
-                    
-            return total_added
-            
-        except Exception as e:
-            logger.error(f"Error maintaining question pool: {str(e)}")
-            return 0
\ No newline at end of file
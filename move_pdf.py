@@ -4,9 +4,13 @@ import shutil
 from pathlib import Path
 import magic
 from typing import List, Tuple
+from utils.file_utils import list_pdf_files
 
 logger = logging.getLogger(__name__)
 
+# Loaded once per process; each Magic instance parses the libmagic database
+_MIME = magic.Magic(mime=True)
+
 class PDFMover:
     """Handles PDF file movement with validation and error handling."""
     
@@ -33,14 +37,16 @@ class PDFMover:
     def validate_file(self, file_path: Path) -> bool:
         """Validate PDF file size and type."""
         try:
-            if not file_path.exists():
+            # One stat answers both existence and size
+            try:
+                file_size = file_path.stat().st_size
+            except FileNotFoundError:
                 error_msg = f"File not found: {file_path}"
                 logger.error(error_msg)
                 self.errors.append(error_msg)
                 return False
                 
             # Check file size
-            file_size = file_path.stat().st_size
             if file_size > self.MAX_FILE_SIZE:
                 error_msg = f"File exceeds size limit of {self.MAX_FILE_SIZE/1024/1024}MB: {file_path}"
                 logger.error(error_msg)
@@ -48,7 +54,7 @@ class PDFMover:
                 return False
                 
             # Check file type using python-magic
-            mime_type = magic.from_file(str(file_path), mime=True)
+            mime_type = _MIME.from_file(str(file_path))
             if mime_type not in self.ALLOWED_MIME_TYPES:
                 error_msg = f"Invalid file type {mime_type} for file: {file_path}"
                 logger.error(error_msg)
@@ -96,11 +102,10 @@ class PDFMover:
         if not self.setup_directory():
             return 0, self.errors
             
-        source_path = Path(source_dir)
         moved_count = 0
         
         try:
-            pdf_files = list(source_path.glob('*.pdf'))
+            pdf_files = list_pdf_files(source_dir)
             if not pdf_files:
                 logger.info("No PDF files found in source directory")
                 return 0, self.errors
@@ -1,32 +1,137 @@
 import logging
 import os
-import shutil
 from pathlib import Path
 import json
+import hashlib
+import re
 import time
+from collections import defaultdict
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from typing import Dict, List, Optional, Tuple
 from flask import Flask
-from models import Question, Category, db
+from pythonjsonlogger import jsonlogger
+from sqlalchemy import func, insert, inspect, select, text
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from models import Question, Category, ProcessedPDF, QUESTION_TEXT_INDEXES, db
+from extensions import engine_options, json_serializer
 from utils.text_to_pdf import convert_text_to_pdf
 from utils.perplexity import generate_questions, COURT_REPORTER_TOPICS
 from utils.pdf_parser import QuestionProcessor, ProcessingError
+from utils.file_utils import fast_copy, list_pdf_files
 from move_pdf import PDFMover
 
 # Configure basic logging without Flask dependencies
-logging.basicConfig(
-    level=logging.INFO,
-    format='{"timestamp": "%(asctime)s", "level": "%(levelname)s", "name": "%(name)s", "message": "%(message)s"}',
-    datefmt='%Y-%m-%d %H:%M:%S,%03d'
-)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(jsonlogger.JsonFormatter(
+    '%(asctime)s %(levelname)s %(name)s %(message)s',
+    rename_fields={'asctime': 'timestamp', 'levelname': 'level'},
+    json_default=str,
+    json_serializer=json_serializer
+))
+logging.basicConfig(level=logging.INFO, handlers=[_log_handler])
 logger = logging.getLogger(__name__)
 
+__all__ = [
+    'QuestionPoolManager', 'create_app', 'ensure_question_index', 'insert_questions',
+    'list_pdf_files', 'load_category_ids', 'process_pdfs'
+]
+
+def insert_questions(rows: List[Dict]) -> int:
+    """Bulk insert question rows in one statement, skipping duplicates. Returns rows inserted."""
+    if not rows:
+        return 0
+    result = db.session.execute(
+        pg_insert(Question).values(rows).on_conflict_do_nothing()
+    )
+    return result.rowcount
+
+# Per-process state for PDF parsing workers
+_worker_processor = None
+_worker_known_hashes = frozenset()
+
+def _init_parse_worker(known_hashes):
+    global _worker_processor, _worker_known_hashes
+    _worker_processor = QuestionProcessor('pdf_files', 'processed_questions')
+    _worker_known_hashes = frozenset(known_hashes)
+
+def _parse_pdf_file(pdf_file: Path) -> Tuple[Optional[str], List, List[ProcessingError]]:
+    """Parse one PDF in a worker process. Returns (content_hash, questions, errors)."""
+    try:
+        logger.info("Processing PDF file: %s", pdf_file.name)
+        # Read each PDF once and parse from memory; oversized files
+        # go through the path-based route, which rejects them
+        if pdf_file.stat().st_size > _worker_processor.MAX_FILE_SIZE:
+            questions, errors = _worker_processor.process_pdf(pdf_file.name)
+            return None, questions, errors
+
+        data = pdf_file.read_bytes()
+        content_hash = hashlib.sha256(data).hexdigest()
+        if content_hash in _worker_known_hashes:
+            return content_hash, [], []
+        questions, errors = _worker_processor.process_pdf_bytes(pdf_file.name, data)
+        return content_hash, questions, errors
+    except Exception as e:
+        return None, [], [ProcessingError("PROCESSING_ERROR", str(e), pdf_file.name)]
+
+def load_category_ids() -> Dict[str, int]:
+    """Map every category name to its id with a single query."""
+    return dict(db.session.execute(select(Category.name, Category.id)).all())
+
+NEAR_DUPLICATE_THRESHOLD = 0.9  # Token-set Jaccard similarity treated as a paraphrase
+
+def question_signature(text: str) -> frozenset:
+    """Reduce question text to its set of lowercase word tokens."""
+    return frozenset(re.findall(r'[a-z0-9]+', text.lower()))
+
+def is_near_duplicate(signature: frozenset, known: List[frozenset]) -> bool:
+    """Check whether a signature overlaps any known one above the threshold."""
+    for other in known:
+        union = len(signature | other)
+        if union and len(signature & other) / union >= NEAR_DUPLICATE_THRESHOLD:
+            return True
+    return False
+
+GENERATION_WORKERS = 8  # One per topic; keeps concurrent API calls bounded
+
+def _generate_category_questions(category: str, needed_count: int, existing_texts: frozenset = frozenset(),
+                                 retries: int = 3) -> Tuple[List[Dict], Optional[str]]:
+    """Generate up to needed_count new distinct questions for one category. Returns (questions, error).
+
+    Texts in existing_texts are already stored, so they don't count toward needed_count.
+    """
+    collected = {}
+    error = None
+    for attempt in range(retries):
+        try:
+            batch_size = min(20, needed_count - len(collected))
+            questions = generate_questions(category, count=batch_size)
+            for question_data in questions or []:
+                if question_data['question_text'] not in existing_texts:
+                    collected.setdefault(question_data['question_text'], question_data)
+
+            if len(collected) >= needed_count:
+                break
+                
+        except Exception as e:
+            logger.error(f"Attempt {attempt + 1}/{retries} failed: {str(e)}")
+            if attempt == retries - 1:
+                error = f"Failed to generate questions for {category} after {retries} attempts"
+        
+        time.sleep(2)  # Brief pause between attempts
+
+    return list(collected.values()), error
+
 class QuestionPoolManager:
     """Manages the question pool and ensures minimum question thresholds."""
     
-    def __init__(self, min_threshold: int = 50):
-        """Initialize with minimum threshold."""
+    def __init__(self, min_threshold: int = 50, max_workers: Optional[int] = None):
+        """Initialize with minimum threshold and PDF parsing worker count (default: CPU count)."""
         self.min_threshold = min_threshold
+        self.max_workers = max_workers
+        # Token signatures of stored questions per category id, for near-duplicate checks
+        self._signature_cache: Dict[int, List[frozenset]] = {}
         self.pdf_processor = QuestionProcessor('pdf_files', 'processed_questions')
         self.pdf_mover = PDFMover('pdf_files')
     
@@ -44,11 +149,19 @@ class QuestionPoolManager:
         ]
         
         try:
-            for name, description in categories:
-                if not Category.query.filter_by(name=name).first():
-                    category = Category(name=name, description=description)
-                    db.session.add(category)
-            db.session.commit()
+            # One SELECT for the names already present, one bulk INSERT for the rest
+            names = [name for name, _ in categories]
+            existing = {
+                name for (name,) in db.session.query(Category.name).filter(Category.name.in_(names)).all()
+            }
+            missing = [
+                {'name': name, 'description': description}
+                for name, description in categories
+                if name not in existing
+            ]
+            if missing:
+                db.session.execute(insert(Category), missing)
+                db.session.commit()
             logger.info("Categories verified and created if needed")
         except Exception as e:
             logger.error(f"Error ensuring categories: {str(e)}")
@@ -61,14 +174,13 @@ class QuestionPoolManager:
             backup_dir = Path('pdf_files') / 'processed_backup' / datetime.now().strftime('%Y%m%d_%H%M%S')
             backup_dir.mkdir(parents=True, exist_ok=True)
             
-            pdf_dir = Path('pdf_files')
-            pdf_files = list(pdf_dir.glob('*.pdf'))
+            pdf_files = list_pdf_files('pdf_files')
             if not pdf_files:
                 logger.info("No PDF files to backup")
                 return True
 
-            for pdf_file in pdf_dir.glob('*.pdf'):
-                shutil.copy2(pdf_file, backup_dir / pdf_file.name)
+            for pdf_file in pdf_files:
+                fast_copy(pdf_file, backup_dir / pdf_file.name)
                 
             logger.info(f"Created backup of {len(pdf_files)} PDF files in {backup_dir}")
             return True
@@ -88,10 +200,24 @@ class QuestionPoolManager:
                 logger.info("No study materials text files found")
                 return 0, []
 
-            for txt_file in study_files:
-                try:
+            # Conversion is CPU-bound, so files are converted in parallel worker
+            # processes and handled in completion order
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {}
+                for txt_file in study_files:
                     logger.info(f"Converting {txt_file} to PDF...")
-                    pdf_file = convert_text_to_pdf(txt_file, 'pdf_files')
+                    futures[executor.submit(convert_text_to_pdf, txt_file, 'pdf_files')] = txt_file
+
+                for future in as_completed(futures):
+                    txt_file = futures[future]
+                    try:
+                        pdf_file = future.result()
+                    except Exception as e:
+                        error_msg = f"Error processing text file {txt_file}: {str(e)}"
+                        logger.error(error_msg)
+                        errors.append(error_msg)
+                        continue
+
                     if pdf_file:
                         logger.info(f"Successfully converted {txt_file} to PDF: {pdf_file}")
                         total_converted += 1
@@ -99,10 +225,6 @@ class QuestionPoolManager:
                         error_msg = f"Failed to convert {txt_file} to PDF"
                         logger.error(error_msg)
                         errors.append(error_msg)
-                except Exception as e:
-                    error_msg = f"Error processing text file {txt_file}: {str(e)}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
                     
             return total_converted, errors
             
@@ -111,70 +233,100 @@ class QuestionPoolManager:
             logger.error(error_msg)
             return 0, [error_msg]
 
+    def _drop_near_duplicates(self, category_id: int, questions: List[Dict]) -> List[Dict]:
+        """Filter out generated questions that paraphrase ones already in the category."""
+        known = self._signature_cache.get(category_id)
+        if known is None:
+            known = [
+                question_signature(text) for text in db.session.scalars(
+                    select(Question.question_text).where(Question.category_id == category_id)
+                )
+            ]
+            self._signature_cache[category_id] = known
+
+        unique = []
+        for question_data in questions:
+            signature = question_signature(question_data['question_text'])
+            if is_near_duplicate(signature, known):
+                continue
+            known.append(signature)
+            unique.append(question_data)
+        return unique
+
     def maintain_question_pool(self) -> Tuple[int, List[str]]:
         """Ensure each category has the minimum required questions."""
         total_generated = 0
         errors = []
         
         try:
+            category_ids = load_category_ids()
+            # One grouped COUNT covers every category instead of a query per topic
+            counts = dict(db.session.execute(
+                select(Category.name, func.count(Question.id))
+                .outerjoin(Question)
+                .group_by(Category.name)
+            ).all())
+            needed = {}
             for category in COURT_REPORTER_TOPICS:
-                current_count = Question.query.join(Category).filter(
-                    Category.name == category
-                ).count()
-                
+                current_count = counts.get(category, 0)
                 if current_count < self.min_threshold:
-                    needed_count = self.min_threshold - current_count
-                    logger.info(f"Generating {needed_count} questions for {category}")
-                    
-                    retries = 3
-                    for attempt in range(retries):
-                        try:
-                            batch_size = min(20, needed_count)
-                            questions = generate_questions(category, count=batch_size)
-                            
-                            if questions:
-                                category_obj = Category.query.filter_by(name=category).first()
-                                if not category_obj:
-                                    errors.append(f"Category not found: {category}")
-                                    break
-                                    
-                                added_count = 0
-                                for question_data in questions:
-                                    try:
-                                        existing = Question.query.filter_by(
-                                            question_text=question_data['question_text'],
-                                            category_id=category_obj.id
-                                        ).first()
-                                        
-                                        if not existing:
-                                            question = Question(
-                                                category_id=category_obj.id,
-                                                question_text=question_data['question_text'],
-                                                correct_answer=question_data['correct_answer'],
-                                                wrong_answers=question_data['wrong_answers']
-                                            )
-                                            db.session.add(question)
-                                            added_count += 1
-                                            
-                                    except Exception as e:
-                                        errors.append(f"Error adding question: {str(e)}")
-                                        continue
-                                        
-                                if added_count > 0:
-                                    db.session.commit()
-                                    total_generated += added_count
-                                    needed_count -= added_count
-                                    logger.info(f"Added {added_count} questions to {category}")
-                                    
-                                if needed_count <= 0:
-                                    break
-                                    
-                        except Exception as e:
-                            logger.error(f"Attempt {attempt + 1}/{retries} failed: {str(e)}")
-                            if attempt == retries - 1:
-                                errors.append(f"Failed to generate questions for {category} after {retries} attempts")
+                    needed[category] = self.min_threshold - current_count
+                    logger.info(f"Generating {needed[category]} questions for {category}")
+
+            if not needed:
+                return 0, errors
+
+            # Stored texts per category, so regenerated copies aren't counted as new
+            existing_texts = defaultdict(set)
+            for category, question_text in db.session.execute(
+                select(Category.name, Question.question_text)
+                .join(Question)
+                .where(Category.name.in_(needed))
+            ):
+                existing_texts[category].add(question_text)
+
+            # Generation is I/O-bound on the API, so categories are requested
+            # concurrently; inserts stay on this thread with the app's session
+            with ThreadPoolExecutor(max_workers=min(GENERATION_WORKERS, len(needed))) as executor:
+                futures = {
+                    executor.submit(
+                        _generate_category_questions, category, count, frozenset(existing_texts[category])
+                    ): category
+                    for category, count in needed.items()
+                }
+                for future in as_completed(futures):
+                    category = futures[future]
+                    questions, error = future.result()
+                    if error:
+                        errors.append(error)
+                    if not questions:
+                        continue
+
+                    category_id = category_ids.get(category)
+                    if not category_id:
+                        errors.append(f"Category not found: {category}")
+                        continue
+
+                    questions = self._drop_near_duplicates(category_id, questions)
+                    if not questions:
+                        logger.info(f"All generated questions for {category} were near-duplicates")
+                        continue
                         
-                        time.sleep(2)  # Brief pause between attempts
+                    rows = [
+                        {
+                            'category_id': category_id,
+                            'question_text': question_data['question_text'],
+                            'correct_answer': question_data['correct_answer'],
+                            'wrong_answers': question_data['wrong_answers']
+                        }
+                        for question_data in questions
+                    ]
+                    added_count = insert_questions(rows)
+
+                    if added_count > 0:
+                        db.session.commit()
+                        total_generated += added_count
+                        logger.info(f"Added {added_count} questions to {category}")
                         
             return total_generated, errors
             
@@ -205,66 +357,96 @@ class QuestionPoolManager:
                 logger.warning("Failed to create PDF backup, proceeding with caution")
             
             # Process all PDFs
-            pdf_dir = Path('pdf_files')
-            pdf_files = list(pdf_dir.glob('*.pdf'))
+            pdf_files = list_pdf_files('pdf_files')
             logger.info(f"Found {len(pdf_files)} PDF files to process")
+
+            category_ids = load_category_ids()
+
+            # Content hashes of PDFs ingested on earlier runs
+            processed_hashes = {
+                digest for (digest,) in db.session.query(ProcessedPDF.sha256).all()
+            }
             
-            for pdf_file in pdf_files:
-                try:
-                    logger.info(f"Processing PDF file: {pdf_file.name}")
-                    questions, errors = self.pdf_processor.process_pdf(pdf_file.name)
-                    all_errors.extend([e.message for e in errors])
+            # Parsing fans out to worker processes; database writes stay in this one
+            executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_parse_worker,
+                initargs=(processed_hashes,)
+            )
+            with executor:
+                parsed = zip(pdf_files, executor.map(_parse_pdf_file, pdf_files))
+                for pdf_file, (content_hash, questions, errors) in parsed:
+                    try:
+                        # Also catches identical files seen earlier in this run
+                        if content_hash in processed_hashes:
+                            logger.info("Skipping unchanged PDF: %s", pdf_file.name)
+                            continue
+                        all_errors.extend([e.message for e in errors])
                     
-                    if questions:
-                        # Save processed questions
-                        output_name = f"processed_{pdf_file.stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                        output_path = self.pdf_processor.save_questions(questions, output_name)
+                        if questions:
+                            # Save processed questions
+                            output_name = f"processed_{pdf_file.stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                            output_path = self.pdf_processor.save_questions(questions, output_name)
                         
-                        if output_path:
-                            # Add questions to database with enhanced validation
-                            added_count = 0
-                            for question in questions:
-                                try:
-                                    # Validate category
-                                    category = Category.query.filter_by(name=question.category).first()
-                                    if not category:
-                                        logger.warning(f"Category not found: {question.category}")
-                                        continue
-                                    
-                                    # Check for duplicates
-                                    existing = Question.query.filter_by(
-                                        question_text=question.question_text,
-                                        category_id=category.id
-                                    ).first()
+                            if output_path:
+                                # Add questions to database with enhanced validation
+                                rows = []
+                                question_errors = []
+                                for question in questions:
+                                    try:
+                                        # Validate category
+                                        category_id = category_ids.get(question.category)
+                                        if not category_id:
+                                            logger.warning("Category not found: %s", question.category)
+                                            continue
                                     
-                                    if not existing:
-                                        db_question = Question(
-                                            category_id=category.id,
-                                            question_text=question.question_text,
-                                            correct_answer=question.correct_answer,
-                                            wrong_answers=question.wrong_answers
-                                        )
-                                        db.session.add(db_question)
-                                        added_count += 1
+                                        rows.append({
+                                            'category_id': category_id,
+                                            'question_text': question.question_text,
+                                            'correct_answer': question.correct_answer,
+                                            'wrong_answers': question.wrong_answers
+                                        })
                                         
-                                except Exception as e:
-                                    error_msg = f"Error adding question to database: {str(e)}"
-                                    logger.error(error_msg)
-                                    all_errors.append(error_msg)
-                                    continue
+                                    except Exception as e:
+                                        logger.error("Error adding question to database: %s", e)
+                                        question_errors.append(e)
+                                        continue
                                     
-                            if added_count > 0:
-                                db.session.commit()
-                                total_added += added_count
-                                logger.info(f"Added {added_count} questions from {pdf_file.name}")
-                    else:
-                        logger.warning(f"No valid questions extracted from {pdf_file.name}")
+                                if question_errors:
+                                    all_errors.extend(
+                                        f"Error adding question to database: {e}" for e in question_errors
+                                    )
+
+                                # Savepoint per file: a failure rolls back only this file's rows
+                                with db.session.begin_nested():
+                                    # Duplicates are skipped by the unique (category_id, question_text) index
+                                    added_count = insert_questions(rows)
+
+                                    # Record the file so an unchanged copy is skipped next run
+                                    if content_hash:
+                                        db.session.add(ProcessedPDF(sha256=content_hash, filename=pdf_file.name))
+                                if content_hash:
+                                    processed_hashes.add(content_hash)
+
+                                if added_count > 0:
+                                    total_added += added_count
+                                    logger.info("Added %d questions from %s", added_count, pdf_file.name)
+                        else:
+                            logger.warning("No valid questions extracted from %s", pdf_file.name)
+                            # A clean parse with nothing to ingest will not change on a
+                            # rerun; files that failed are left unrecorded to be retried
+                            if content_hash and not errors:
+                                db.session.add(ProcessedPDF(sha256=content_hash, filename=pdf_file.name))
+                                processed_hashes.add(content_hash)
                     
-                except Exception as e:
-                    error_msg = f"Error processing PDF {pdf_file.name}: {str(e)}"
-                    logger.error(error_msg)
-                    all_errors.append(error_msg)
-                    continue
+                    except Exception as e:
+                        error_msg = f"Error processing PDF {pdf_file.name}: {str(e)}"
+                        logger.error(error_msg)
+                        all_errors.append(error_msg)
+                        continue
+
+            # One commit for every file ingested in this run
+            db.session.commit()
             
             # Generate additional questions if needed
             generated_count, generation_errors = self.maintain_question_pool()
@@ -275,10 +457,11 @@ class QuestionPoolManager:
             logger.info(f"PDF processing completed in {processing_time:.2f} seconds")
             logger.info(f"Total questions added: {total_added}")
             
-            if all_errors:
-                logger.warning("Errors encountered during processing:")
-                for error in all_errors:
-                    logger.warning(f"- {error}")
+            if all_errors and logger.isEnabledFor(logging.WARNING):
+                logger.warning(
+                    "Errors encountered during processing:\n%s",
+                    '\n'.join(f"- {error}" for error in all_errors)
+                )
             
             return total_added, all_errors
             
@@ -293,14 +476,52 @@ def create_app():
     app = Flask(__name__)
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
     db.init_app(app)
     return app
 
+# Merge duplicate questions into the lowest id, repointing rows that reference them
+_DEDUPE_QUESTIONS_SQL = [
+    """
+    UPDATE {table} SET question_id = (
+        SELECT MIN(q2.id) FROM questions q1
+        JOIN questions q2 ON q2.category_id = q1.category_id AND q2.question_text = q1.question_text
+        WHERE q1.id = {table}.question_id
+    )
+    WHERE question_id NOT IN (SELECT MIN(id) FROM questions GROUP BY category_id, question_text)
+    """.format(table=table)
+    for table in ('test_questions', 'user_question_performance')
+] + [
+    """
+    DELETE FROM questions
+    WHERE id NOT IN (SELECT MIN(id) FROM questions GROUP BY category_id, question_text)
+    """
+]
+
+def ensure_question_index():
+    """Create the unique questions index that insert_questions' ON CONFLICT relies on.
+
+    create_all skips tables that already exist, so databases created before the
+    index get their duplicate questions merged first.
+    """
+    index = QUESTION_TEXT_INDEXES.get(db.engine.dialect.name)
+    if index is None:
+        return
+    if any(ix['name'] == index.name for ix in inspect(db.engine).get_indexes('questions')):
+        return
+    logger.info(f"Creating {index.name} on questions")
+    for statement in _DEDUPE_QUESTIONS_SQL:
+        db.session.execute(text(statement))
+    db.session.execute(CreateIndex(index, if_not_exists=True))
+    db.session.commit()
+
 def process_pdfs():
     """Main entry point for PDF processing with enhanced error handling."""
     app = create_app()
     with app.app_context():
         try:
+            db.create_all()  # Creates processed_pdfs on databases that predate it
+            ensure_question_index()
             pool_manager = QuestionPoolManager()
             pool_manager.ensure_categories()
             return pool_manager.process_pdfs()
@@ -1,34 +1,27 @@
 #!/usr/bin/env python3
 import os
 import logging
-import magic
-from pathlib import Path
 from utils.text_to_pdf import convert_text_to_pdf
+from utils.file_utils import fast_copy
 import time
 from typing import Optional, Tuple, List
 import traceback
-import shutil
 import hashlib
+import mmap
 from datetime import datetime
 
-# Configure logging with JSON format
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+PDF_SIGNATURE = b'%PDF-'
+
 class PDFValidationError(Exception):
     """Custom exception for PDF validation errors."""
     pass
 
 def calculate_file_hash(file_path: str) -> str:
     """Calculate SHA-256 hash of a file for integrity checking."""
-    sha256_hash = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+        return hashlib.file_digest(f, "sha256").hexdigest()
 
 def validate_pdf(file_path: str) -> Tuple[bool, Optional[str]]:
     """
@@ -36,32 +29,32 @@ def validate_pdf(file_path: str) -> Tuple[bool, Optional[str]]:
     Returns: (is_valid, error_message)
     """
     try:
-        if not os.path.exists(file_path):
+        # A single stat covers both the existence and size checks
+        try:
+            file_size = os.stat(file_path).st_size
+        except FileNotFoundError:
             return False, f"File not found: {file_path}"
             
         # Check file size (20MB limit)
         max_size = 20 * 1024 * 1024  # 20MB
-        file_size = os.path.getsize(file_path)
         if file_size > max_size:
             return False, f"File too large: {file_path} exceeds 20MB limit (size: {file_size/1024/1024:.2f}MB)"
             
         if file_size == 0:
             return False, f"File is empty: {file_path}"
             
-        # Validate file type using python-magic
-        mime = magic.Magic(mime=True)
-        file_type = mime.from_file(file_path)
-        
-        valid_types = {'application/pdf', 'application/x-pdf'}
-        if file_type not in valid_types:
-            return False, f"Invalid file type: {file_type}, expected PDF"
-            
         # Check file extension
         if not file_path.lower().endswith('.pdf'):
             return False, f"Invalid file extension: {file_path}, expected .pdf"
             
-        # Calculate and log file hash for integrity checking
-        file_hash = calculate_file_hash(file_path)
+        # Map the file once; the signature check and the hash read the same pages
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Validate file type from the PDF signature instead of a libmagic lookup
+            if mm[:len(PDF_SIGNATURE)] != PDF_SIGNATURE:
+                return False, f"Invalid file type: {file_path}, expected PDF"
+                
+            # Calculate and log file hash for integrity checking
+            file_hash = hashlib.sha256(mm).hexdigest()
         logger.info(f"File hash for {file_path}: {file_hash}")
             
         return True, None
@@ -92,7 +85,7 @@ def create_backup(file_path: str, backup_dir: str) -> Tuple[bool, Optional[str]]
         source_hash = calculate_file_hash(file_path)
         
         # Create backup
-        shutil.copy2(file_path, backup_path)
+        fast_copy(file_path, backup_path)
         
         # Verify backup integrity
         backup_hash = calculate_file_hash(backup_path)
@@ -199,6 +192,11 @@ def process_study_materials() -> bool:
         return False
 
 if __name__ == "__main__":
+    # Configure logging only when run as a script so importers keep their own setup
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
     try:
         logger.info("Starting study materials processing...")
         if process_study_materials():
@@ -1,12 +1,16 @@
 from flask import Blueprint
+import logging
 
 bp = Blueprint('main', __name__)
 
 from . import dashboard  # Import views after creating blueprint to avoid circular imports
 
+logger = logging.getLogger(__name__)
+
 def create_admin_user():
     """Create admin user if not exists."""
-    from models import User, db
+    from models import User, password_hasher, db
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
     import os
     
     admin_email = os.environ.get('ADMIN_EMAIL')
@@ -15,16 +19,23 @@ def create_admin_user():
     
     if not all([admin_email, admin_username, admin_password]):
         return False
-        
-    admin = User.query.filter_by(email=admin_email).first()
-    if not admin:
-        admin = User(
-            username=admin_username,
-            email=admin_email,
-            is_admin=True
+
+    try:
+        # A single INSERT that skips an existing username/email, so workers
+        # starting at the same time can't race each other into a duplicate
+        result = db.session.execute(
+            pg_insert(User).values(
+                username=admin_username,
+                email=admin_email,
+                password_hash=password_hasher.hash(admin_password),
+                is_admin=True
+            ).on_conflict_do_nothing()
         )
-        admin.set_password(admin_password)
-        db.session.add(admin)
         db.session.commit()
-        return True
-    return True
+        if result.rowcount:
+            logger.info('Admin user created successfully')
+        return User.query.filter_by(email=admin_email).first()
+    except Exception as e:
+        logger.error(f'Error creating admin user: {str(e)}')
+        db.session.rollback()
+        return None
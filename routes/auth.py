@@ -1,6 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, login_required, current_user
-from models import User, db
+from models import User, get_user, db
+from extensions import cache
+from sqlalchemy.exc import IntegrityError
+from utils.login_throttle import login_blocked, record_login_failure, clear_login_failures
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField
 from wtforms.validators import DataRequired, Email, Length, EqualTo
@@ -22,37 +25,57 @@ auth = Blueprint('auth', __name__)
 @auth.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('main.index'))
+        return redirect(url_for('index'))
         
     form = LoginForm()
     if form.validate_on_submit():
+        # Repeated failures are turned away before the lookup and hash check
+        if login_blocked(form.email.data, request.remote_addr):
+            flash('Too many failed login attempts. Please try again later.')
+            return render_template('auth/login.html', form=form), 429
+
         user = User.query.filter_by(email=form.email.data).first()
         if user and user.check_password(form.password.data):
+            clear_login_failures(form.email.data, request.remote_addr)
             login_user(user)
+            # Persist a password hash upgraded by check_password
+            if db.session.is_modified(user):
+                db.session.commit()
+                cache.delete_memoized(get_user, user.id)
             next_page = request.args.get('next')
             return redirect(next_page if next_page else url_for('dashboard.show_dashboard'))
+        record_login_failure(form.email.data, request.remote_addr)
         flash('Invalid email or password')
     return render_template('auth/login.html', form=form)
 
 @auth.route('/register', methods=['GET', 'POST'])
 def register():
     if current_user.is_authenticated:
-        return redirect(url_for('main.index'))
+        return redirect(url_for('index'))
         
     form = RegistrationForm()
     if form.validate_on_submit():
-        user = User.query.filter_by(email=form.email.data).first()
-        if user:
-            flash('Email address already registered')
-            return redirect(url_for('auth.register'))
-            
         user = User(
             username=form.username.data,
             email=form.email.data
         )
         user.set_password(form.password.data)
         db.session.add(user)
-        db.session.commit()
+        # Duplicates are caught by the unique constraints on the INSERT
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            # PostgreSQL reports the violated constraint, and its message
+            # quotes the submitted values, so text is only matched for SQLite
+            diag = getattr(e.orig, 'diag', None)
+            constraint = getattr(diag, 'constraint_name', None)
+            if constraint == 'users_email_key' or (
+                    constraint is None and 'users.email' in str(e.orig)):
+                flash('Email address already registered')
+            else:
+                flash('Username already taken')
+            return redirect(url_for('auth.register'))
         
         flash('Registration successful! Please log in.')
         return redirect(url_for('auth.login'))
@@ -1,154 +1,184 @@
 from flask import Blueprint, render_template, jsonify
 from flask_login import login_required, current_user
-from models import UserQuestionPerformance, Category, Question, Test, StudySession, db
-from sqlalchemy import func, desc, and_
+from extensions import cache
+from models import UserQuestionPerformance, Category, Question, Test, TestQuestion, StudySession, db
+from sqlalchemy import func, and_
 from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 dashboard = Blueprint('dashboard', __name__)
 
-@dashboard.route('/dashboard')
-@login_required
-def show_dashboard():
-    try:
-        # Overall statistics
-        total_questions = UserQuestionPerformance.query.filter_by(user_id=current_user.id).count()
-        correct_answers = UserQuestionPerformance.query.filter_by(
-            user_id=current_user.id
-        ).with_entities(
-            func.sum(UserQuestionPerformance.correct_attempts)
-        ).scalar() or 0
-        
-        total_attempts = UserQuestionPerformance.query.filter_by(
-            user_id=current_user.id
-        ).with_entities(
-            func.sum(UserQuestionPerformance.total_attempts)
-        ).scalar() or 0
-        
-        # Calculate accuracy and study time
-        accuracy = (correct_answers / total_attempts * 100) if total_attempts > 0 else 0
-        avg_response_time = UserQuestionPerformance.query.filter_by(
-            user_id=current_user.id
-        ).with_entities(
-            func.avg(UserQuestionPerformance.average_response_time)
-        ).scalar() or 0
+@cache.memoize(60)
+def dashboard_stats(user_id):
+    """Template context for the progress dashboard, cached per user.
 
-        # Study time analytics
-        total_study_time = db.session.query(
-            func.sum(StudySession.actual_duration)
-        ).filter(
-            StudySession.user_id == current_user.id,
-            StudySession.is_completed == True
-        ).scalar() or 0
+    Nothing invalidates the entry, so new results show up within the 60 second timeout.
+    """
+    # Overall statistics and accuracy in one pass over the user's performance rows
+    total_questions, accuracy, avg_response_time = db.session.query(
+        func.count(UserQuestionPerformance.id),
+        func.coalesce(
+            func.sum(UserQuestionPerformance.correct_attempts) * 100.0 /
+            func.nullif(func.sum(UserQuestionPerformance.total_attempts), 0),
+            0
+        ),
+        func.coalesce(func.avg(UserQuestionPerformance.average_response_time), 0)
+    ).filter(
+        UserQuestionPerformance.user_id == user_id
+    ).one()
 
-        # Recent activity summary
-        recent_activity = db.session.query(
-            func.date(Test.created_at).label('date'),
-            func.count(Test.id).label('tests_taken'),
-            func.avg(Test.score).label('avg_score'),
-            func.sum(Test.completion_time).label('total_time')
-        ).filter(
-            Test.user_id == current_user.id,
-            Test.created_at >= datetime.utcnow() - timedelta(days=7)
-        ).group_by(
-            func.date(Test.created_at)
-        ).order_by(desc('date')).all()
-        
-        # Performance by category with detailed metrics
-        category_stats = db.session.query(
-            Category.name,
-            func.count(Question.id).label('total_questions'),
-            func.avg(UserQuestionPerformance.ease_factor).label('avg_ease'),
-            func.avg(
-                (UserQuestionPerformance.correct_attempts * 100.0 / 
-                func.nullif(UserQuestionPerformance.total_attempts, 0))
-            ).label('accuracy'),
-            func.avg(UserQuestionPerformance.average_response_time).label('avg_response_time'),
-            func.count(UserQuestionPerformance.id).label('questions_attempted')
-        ).join(
-            Question, Category.id == Question.category_id
-        ).outerjoin(
-            UserQuestionPerformance, 
-            and_(Question.id == UserQuestionPerformance.question_id,
-                 UserQuestionPerformance.user_id == current_user.id)
-        ).group_by(Category.name).all()
+    # Study time analytics
+    total_study_time = db.session.query(
+        func.sum(StudySession.actual_duration)
+    ).filter(
+        StudySession.user_id == user_id,
+        StudySession.is_completed == True
+    ).scalar() or 0
 
-        # Study streak calculation
-        study_dates = db.session.query(
-            func.date(StudySession.start_time)
-        ).filter(
-            StudySession.user_id == current_user.id,
-            StudySession.is_completed == True
-        ).distinct().order_by(
-            func.date(StudySession.start_time)
-        ).all()
+    # Weekly progress from one grouped query, then a row for each of the last 7 days
+    today = datetime.utcnow().date()
+    week_start = datetime.combine(today - timedelta(days=6), datetime.min.time())
+    question_counts = db.session.query(
+        TestQuestion.test_id,
+        func.count(TestQuestion.id).label('question_count')
+    ).join(
+        Test, Test.id == TestQuestion.test_id
+    ).filter(
+        Test.user_id == user_id,
+        Test.created_at >= week_start
+    ).group_by(TestQuestion.test_id).subquery()
 
-        current_streak = 0
-        if study_dates:
-            today = datetime.utcnow().date()
-            last_date = None
-            for date_tuple in reversed(study_dates):
-                date = date_tuple[0]
-                if last_date is None or (last_date - date).days == 1:
-                    current_streak += 1
-                    last_date = date
-                else:
-                    break
+    progress_rows = db.session.query(
+        func.date(Test.created_at).label('date'),
+        func.count(Test.id).label('tests_taken'),
+        func.avg(Test.score).label('avg_score'),
+        func.sum(Test.completion_time).label('study_time'),
+        func.sum(question_counts.c.question_count).label('questions_practiced')
+    ).outerjoin(
+        question_counts, question_counts.c.test_id == Test.id
+    ).filter(
+        Test.user_id == user_id,
+        Test.completed == True,
+        Test.created_at >= week_start
+    ).group_by(
+        func.date(Test.created_at)
+    ).all()
 
-        # Weak areas identification
-        weak_areas = db.session.query(
-            Category.name,
-            func.avg(
-                (UserQuestionPerformance.correct_attempts * 100.0 / 
-                func.nullif(UserQuestionPerformance.total_attempts, 0))
-            ).label('accuracy'),
-            func.count(Question.id).label('total_questions'),
-            func.avg(UserQuestionPerformance.ease_factor).label('difficulty')
-        ).join(
-            Question, Category.id == Question.category_id
-        ).join(
-            UserQuestionPerformance, Question.id == UserQuestionPerformance.question_id
-        ).filter(
-            UserQuestionPerformance.user_id == current_user.id
-        ).group_by(Category.name).having(
-            func.avg(
-                (UserQuestionPerformance.correct_attempts * 100.0 / 
-                func.nullif(UserQuestionPerformance.total_attempts, 0))
-            ) < 70
-        ).order_by('accuracy').all()
+    # func.date gives a date on PostgreSQL and a string on SQLite
+    progress_by_date = {str(row.date): row for row in progress_rows}
+    daily_progress = []
+    for days_ago in range(6, -1, -1):
+        day = (today - timedelta(days=days_ago)).isoformat()
+        row = progress_by_date.get(day)
+        daily_progress.append({
+            'date': day,
+            'tests_taken': row.tests_taken if row else 0,
+            'avg_score': float(row.avg_score or 0) if row else 0.0,
+            'study_time': (row.study_time or 0) if row else 0,
+            'questions_practiced': int(row.questions_practiced or 0) if row else 0
+        })
+    
+    # Performance by category with detailed metrics
+    category_stats = db.session.query(
+        Category.name,
+        func.count(Question.id).label('total_questions'),
+        func.avg(UserQuestionPerformance.ease_factor).label('avg_ease'),
+        func.avg(
+            (UserQuestionPerformance.correct_attempts * 100.0 / 
+            func.nullif(UserQuestionPerformance.total_attempts, 0))
+        ).label('accuracy'),
+        func.avg(UserQuestionPerformance.average_response_time).label('avg_response_time'),
+        func.count(UserQuestionPerformance.id).label('questions_attempted')
+    ).join(
+        Question, Category.id == Question.category_id
+    ).outerjoin(
+        UserQuestionPerformance, 
+        and_(Question.id == UserQuestionPerformance.question_id,
+             UserQuestionPerformance.user_id == user_id)
+    ).group_by(Category.name).all()
 
-        # Most challenging questions
-        challenging_questions = db.session.query(
-            Question.question_text,
-            Category.name.label('category'),
-            UserQuestionPerformance.accuracy,
-            UserQuestionPerformance.total_attempts,
-            UserQuestionPerformance.average_response_time
-        ).join(
-            Category, Question.category_id == Category.id
-        ).join(
-            UserQuestionPerformance, Question.id == UserQuestionPerformance.question_id
-        ).filter(
-            UserQuestionPerformance.user_id == current_user.id,
-            UserQuestionPerformance.total_attempts > 0,
-            UserQuestionPerformance.accuracy < 50
-        ).order_by(
-            UserQuestionPerformance.accuracy
-        ).limit(5).all()
+    # Study streak calculation
+    study_dates = db.session.query(
+        func.date(StudySession.start_time)
+    ).filter(
+        StudySession.user_id == user_id,
+        StudySession.is_completed == True
+    ).distinct().order_by(
+        func.date(StudySession.start_time)
+    ).all()
+
+    current_streak = 0
+    if study_dates:
+        today = datetime.utcnow().date()
+        last_date = None
+        for date_tuple in reversed(study_dates):
+            date = date_tuple[0]
+            if last_date is None or (last_date - date).days == 1:
+                current_streak += 1
+                last_date = date
+            else:
+                break
+
+    # Weak areas are the attempted categories under 70% accuracy, taken
+    # from category_stats rather than a second pass over the same join
+    weak_areas = sorted(
+        (
+            {
+                'name': stat.name,
+                'accuracy': stat.accuracy,
+                # The weak-area list counts only the questions the user has attempted
+                'total_questions': stat.questions_attempted,
+                'difficulty': stat.avg_ease
+            }
+            for stat in category_stats
+            if stat.accuracy is not None and stat.accuracy < 70
+        ),
+        key=lambda area: area['accuracy']
+    )
 
-        return render_template(
-            'dashboard/index.html',
-            total_questions=total_questions,
-            accuracy=round(accuracy, 2),
-            avg_response_time=round(avg_response_time, 2),
-            total_study_time=total_study_time,
-            current_streak=current_streak,
-            category_stats=category_stats,
-            recent_activity=recent_activity,
-            weak_areas=weak_areas,
-            challenging_questions=challenging_questions
-        )
+    # Most challenging questions; accuracy is a Python property on the model,
+    # so the query spells out the same ratio in SQL
+    question_accuracy = (
+        UserQuestionPerformance.correct_attempts * 100.0 /
+        func.nullif(UserQuestionPerformance.total_attempts, 0)
+    )
+    challenging_questions = db.session.query(
+        Question.question_text,
+        Category.name.label('category'),
+        question_accuracy.label('accuracy'),
+        UserQuestionPerformance.total_attempts,
+        UserQuestionPerformance.average_response_time
+    ).join(
+        Category, Question.category_id == Category.id
+    ).join(
+        UserQuestionPerformance, Question.id == UserQuestionPerformance.question_id
+    ).filter(
+        UserQuestionPerformance.user_id == user_id,
+        UserQuestionPerformance.total_attempts > 0,
+        question_accuracy < 50
+    ).order_by(
+        question_accuracy
+    ).limit(5).all()
+
+    return dict(
+        total_questions=total_questions,
+        accuracy=round(float(accuracy), 2),
+        avg_response_time=round(avg_response_time, 2),
+        total_study_time=total_study_time,
+        current_streak=current_streak,
+        category_stats=category_stats,
+        daily_progress=daily_progress,
+        weak_areas=weak_areas,
+        challenging_questions=challenging_questions
+    )
+
+@dashboard.route('/dashboard')
+@login_required
+def show_dashboard():
+    try:
+        stats = dashboard_stats(current_user.id)
+        return render_template('dashboard/index.html', **stats)
         
     except Exception as e:
         logger.error(f"Error in dashboard: {str(e)}", exc_info=True)
@@ -0,0 +1,31 @@
+import os
+import shutil
+import logging
+from pathlib import Path
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 2 ** 31 - 1  # Largest count copy_file_range accepts in one call
+
+def fast_copy(src, dst):
+    """Copy a file and its metadata, using in-kernel copy_file_range where available."""
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            while os.copy_file_range(fsrc.fileno(), fdst.fileno(), COPY_CHUNK_SIZE) > 0:
+                pass
+    except (AttributeError, OSError) as e:
+        # Not Linux, or the filesystem pair does not support it
+        logger.debug("copy_file_range unavailable for %s, falling back: %s", src, e)
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+    return dst
+
+def list_pdf_files(directory) -> List[Path]:
+    """List PDF files in a directory using a single scandir pass."""
+    # DirEntry caches the file type from readdir, so no extra stat per entry
+    with os.scandir(directory) as entries:
+        return [
+            Path(entry.path) for entry in entries
+            if entry.name.endswith('.pdf') and entry.is_file()
+        ]
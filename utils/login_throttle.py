@@ -0,0 +1,18 @@
+from extensions import cache
+
+LOGIN_ATTEMPT_LIMIT = 5
+LOGIN_ATTEMPT_WINDOW = 60  # seconds since the last failure
+
+def _failure_key(identifier: str, remote_addr: str) -> str:
+    return f'login_fail:{remote_addr}:{identifier.lower()}'
+
+def login_blocked(identifier: str, remote_addr: str) -> bool:
+    """Check whether this client has used up its failed attempts for the identifier."""
+    return (cache.get(_failure_key(identifier, remote_addr)) or 0) >= LOGIN_ATTEMPT_LIMIT
+
+def record_login_failure(identifier: str, remote_addr: str) -> None:
+    key = _failure_key(identifier, remote_addr)
+    cache.set(key, (cache.get(key) or 0) + 1, timeout=LOGIN_ATTEMPT_WINDOW)
+
+def clear_login_failures(identifier: str, remote_addr: str) -> None:
+    cache.delete(_failure_key(identifier, remote_addr))
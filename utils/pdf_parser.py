@@ -7,12 +7,16 @@ from typing import Dict, List, Tuple, Optional, Set
 import re
 from pathlib import Path
 import hashlib
+from io import BytesIO
 import json
 from datetime import datetime
 import shutil
 
 logger = logging.getLogger(__name__)
 
+# Loaded once per process; each Magic instance parses the libmagic database
+_MIME = magic.Magic(mime=True)
+
 @dataclass
 class ProcessingError:
     error_type: str
@@ -79,38 +83,7 @@ class QuestionProcessor:
             with open(pdf_path, 'rb') as file:
                 try:
                     reader = PyPDF2.PdfReader(file)
-                    if not reader.pages:
-                        self.errors.append(ProcessingError("EMPTY_PDF", 
-                            "PDF file has no pages", pdf_path.name))
-                        return None
-
-                    text = []
-                    total_pages = len(reader.pages)
-                    logger.info(f"Processing {total_pages} pages from {pdf_path}")
-
-                    for i, page in enumerate(reader.pages, 1):
-                        try:
-                            page_text = page.extract_text()
-                            if not page_text:
-                                logger.warning(f"Empty text content in page {i} of {pdf_path}")
-                                continue
-
-                            # Clean and normalize text
-                            page_text = self._clean_text(page_text)
-                            if page_text:  # Only add non-empty cleaned text
-                                text.append(page_text)
-
-                        except Exception as e:
-                            self.errors.append(ProcessingError("PAGE_EXTRACTION_ERROR", 
-                                f"Error extracting page {i}: {str(e)}", pdf_path.name))
-                            continue
-
-                    if not text:
-                        self.errors.append(ProcessingError("NO_TEXT_CONTENT", 
-                            "No text content extracted from PDF", pdf_path.name))
-                        return None
-
-                    return '\n'.join(text)
+                    return self._extract_text_from_reader(reader, pdf_path.name)
 
                 except PyPDF2.PdfReadError as e:
                     self.errors.append(ProcessingError("PDF_READ_ERROR", 
@@ -122,6 +95,41 @@ class QuestionProcessor:
             logger.error(f"Error extracting text from PDF {pdf_path}: {str(e)}")
             return None
 
+    def _extract_text_from_reader(self, reader: PyPDF2.PdfReader, pdf_name: str) -> Optional[str]:
+        """Extract and clean the text of every page from an open PDF reader."""
+        if not reader.pages:
+            self.errors.append(ProcessingError("EMPTY_PDF", 
+                "PDF file has no pages", pdf_name))
+            return None
+
+        text = []
+        total_pages = len(reader.pages)
+        logger.info(f"Processing {total_pages} pages from {pdf_name}")
+
+        for i, page in enumerate(reader.pages, 1):
+            try:
+                page_text = page.extract_text()
+                if not page_text:
+                    logger.warning(f"Empty text content in page {i} of {pdf_name}")
+                    continue
+
+                # Clean and normalize text
+                page_text = self._clean_text(page_text)
+                if page_text:  # Only add non-empty cleaned text
+                    text.append(page_text)
+
+            except Exception as e:
+                self.errors.append(ProcessingError("PAGE_EXTRACTION_ERROR", 
+                    f"Error extracting page {i}: {str(e)}", pdf_name))
+                continue
+
+        if not text:
+            self.errors.append(ProcessingError("NO_TEXT_CONTENT", 
+                "No text content extracted from PDF", pdf_name))
+            return None
+
+        return '\n'.join(text)
+
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text with improved formatting."""
         if not text:
@@ -591,7 +599,7 @@ class QuestionProcessor:
 
             # MIME type validation
             try:
-                mime_type = magic.from_file(str(file_path), mime=True)
+                mime_type = _MIME.from_file(str(file_path))
                 if mime_type not in self.ALLOWED_MIME_TYPES:
                     self.errors.append(ProcessingError("INVALID_FILE_TYPE", 
                         f"Invalid file type: {mime_type}", file_path.name))
@@ -749,7 +757,6 @@ class QuestionProcessor:
     def process_pdf(self, pdf_name: str) -> Tuple[List[Question], List[ProcessingError]]:
         """Process a single PDF file with enhanced error handling."""
         self.errors = []
-        questions = []
         pdf_path = self.input_dir / pdf_name
         self.current_category = None  # Reset category for new file
 
@@ -763,47 +770,112 @@ class QuestionProcessor:
             if not text:
                 return [], self.errors
 
-            # Extract and process sections
-            sections = self._extract_question_sections(text)
-            
-            for question_text, answer_text in sections:
-                try:
-                    # Extract answer options (if present)
-                    options = self._extract_answer_options(answer_text)
-                    if options:
-                        answer_text = options.get(correct_answer_letter, answer_text)
-                    
-                    # Create question object
-                    category = self._detect_category(question_text)
-                    wrong_answers = self._generate_context_aware_wrong_answers(answer_text, category)
-                    
-                    question = Question(
-                        question_text=question_text,
-                        correct_answer=answer_text,
-                        wrong_answers=wrong_answers,
-                        category=category,
-                        source_file=pdf_name
-                    )
-                    
-                    questions.append(question)
-                    logger.info(f"Successfully extracted question: {question_text[:50]}...")
-                    
-                except Exception as e:
-                    self.errors.append(ProcessingError(
-                        "QUESTION_CREATION_ERROR",
-                        f"Error creating question: {str(e)}",
-                        pdf_name
-                    ))
-                    continue
+            return self._build_questions(text, pdf_name), self.errors
 
-            if not questions:
-                logger.warning(f"No valid questions extracted from {pdf_name}")
-            else:
-                logger.info(f"Successfully extracted {len(questions)} questions from {pdf_name}")
+        except Exception as e:
+            self.errors.append(ProcessingError("PROCESSING_ERROR", str(e), pdf_name))
+            logger.error(f"Error processing PDF {pdf_path}: {str(e)}")
+            return [], self.errors
 
-            return questions, self.errors
+    def process_pdf_bytes(self, pdf_name: str, data: bytes) -> Tuple[List[Question], List[ProcessingError]]:
+        """Process a PDF already loaded into memory, parsing it from a single buffer."""
+        self.errors = []
+        self.current_category = None  # Reset category for new file
+
+        try:
+            reader = self.validate_bytes(pdf_name, data)
+            if reader is None:
+                return [], self.errors
+
+            text = self._extract_text_from_reader(reader, pdf_name)
+            if not text:
+                return [], self.errors
+
+            return self._build_questions(text, pdf_name), self.errors
 
         except Exception as e:
             self.errors.append(ProcessingError("PROCESSING_ERROR", str(e), pdf_name))
-            logger.error(f"Error processing PDF {pdf_path}: {str(e)}")
-            return [], self.errors
\ No newline at end of file
+            logger.error(f"Error processing PDF {pdf_name}: {str(e)}")
+            return [], self.errors
+
+    def validate_bytes(self, pdf_name: str, data: bytes) -> Optional[PyPDF2.PdfReader]:
+        """Validate in-memory PDF content, returning the parsed reader on success."""
+        if not data:
+            self.errors.append(ProcessingError("EMPTY_FILE", 
+                "File is empty", pdf_name))
+            return None
+
+        if len(data) > self.MAX_FILE_SIZE:
+            self.errors.append(ProcessingError("FILE_TOO_LARGE", 
+                f"File exceeds size limit of {self.MAX_FILE_SIZE/1024/1024}MB", pdf_name))
+            return None
+
+        # MIME type validation
+        try:
+            mime_type = _MIME.from_buffer(data[:2048])
+            if mime_type not in self.ALLOWED_MIME_TYPES:
+                self.errors.append(ProcessingError("INVALID_FILE_TYPE", 
+                    f"Invalid file type: {mime_type}", pdf_name))
+                return None
+        except Exception as e:
+            self.errors.append(ProcessingError("MIME_TYPE_ERROR", 
+                f"Error checking file type: {str(e)}", pdf_name))
+            return None
+
+        # Verify PDF structure; the reader is reused for text extraction
+        try:
+            reader = PyPDF2.PdfReader(BytesIO(data))
+            if not reader.pages:
+                self.errors.append(ProcessingError("INVALID_PDF_STRUCTURE", 
+                    "PDF file has no pages", pdf_name))
+                return None
+        except Exception as e:
+            self.errors.append(ProcessingError("PDF_STRUCTURE_ERROR", 
+                f"Error verifying PDF structure: {str(e)}", pdf_name))
+            return None
+
+        return reader
+
+    def _build_questions(self, text: str, pdf_name: str) -> List[Question]:
+        """Turn extracted PDF text into question objects."""
+        questions = []
+
+        # Extract and process sections
+        sections = self._extract_question_sections(text)
+        
+        for question_text, answer_text in sections:
+            try:
+                # Extract answer options (if present)
+                options = self._extract_answer_options(answer_text)
+                if options:
+                    answer_text = options.get(correct_answer_letter, answer_text)
+                
+                # Create question object
+                category = self._detect_category(question_text)
+                wrong_answers = self._generate_context_aware_wrong_answers(answer_text, category)
+                
+                question = Question(
+                    question_text=question_text,
+                    correct_answer=answer_text,
+                    wrong_answers=wrong_answers,
+                    category=category,
+                    source_file=pdf_name
+                )
+                
+                questions.append(question)
+                logger.info("Successfully extracted question: %.50s...", question_text)
+                
+            except Exception as e:
+                self.errors.append(ProcessingError(
+                    "QUESTION_CREATION_ERROR",
+                    f"Error creating question: {str(e)}",
+                    pdf_name
+                ))
+                continue
+
+        if not questions:
+            logger.warning(f"No valid questions extracted from {pdf_name}")
+        else:
+            logger.info(f"Successfully extracted {len(questions)} questions from {pdf_name}")
+
+        return questions
@@ -156,7 +156,7 @@ def generate_questions(topic: str, count: int = 3) -> Optional[List[Dict]]:
                     
                     if validate_generated_question(question):
                         questions.append(question)
-                        logger.debug(f"Successfully parsed question: {question_text[:50]}...")
+                        logger.debug("Successfully parsed question: %.50s...", question_text)
                     else:
                         logger.warning(f"Question validation failed: {question_text[:50]}...")
                     